@@ -112,24 +112,19 @@ def augment_coordinates(float[:, ::1] coordinates, float[:] box, float r):
 
     .. versionadded:: 0.19.0
     """
-    cdef bint lo_x, hi_x, lo_y, hi_y, lo_z, hi_z
-    cdef int i, j, N
-    cdef float norm
-    cdef float shiftX[3]
-    cdef float shiftY[3]
-    cdef float shiftZ[3]
+    cdef int i, j, k, m, N, n_shifts
+    cdef float norm, sign, dist
     cdef float coord[3]
     cdef float end[3]
-    cdef float other[3]
+    cdef float width[3]
+    cdef float shift[3][3]
+    cdef float combos[8][3]
     cdef float dm[3][3]
     cdef float reciprocal[3][3]
 
     dm = triclinic_vectors(box)
 
     for i in range(3):
-        shiftX[i] = dm[0][i]
-        shiftY[i] = dm[1][i]
-        shiftZ[i] = dm[2][i]
         end[i] = dm[0][i] + dm[1][i] + dm[2][i]
     # Calculate reciprocal vectors
     _cross(&dm[1][0], &dm[2][0], &reciprocal[0][0])
@@ -140,6 +135,10 @@ def augment_coordinates(float[:, ::1] coordinates, float[:] box, float r):
         norm = _norm(&reciprocal[i][0])
         for j in range(3):
             reciprocal[i][j] = reciprocal[i][j]/norm
+    # Distances between opposite walls, so that the distance from the upper
+    # wall follows from the distance from the lower wall
+    for i in range(3):
+        width[i] = _dot(&end[0], &reciprocal[i][0])
 
     N = coordinates.shape[0]
 
@@ -149,152 +148,54 @@ def augment_coordinates(float[:, ::1] coordinates, float[:] box, float r):
     for i in range(N):
         for j in range(3):
             coord[j] = coordinates[i, j]
-            other[j] = end[j] - coordinates[i, j]
-        # identify the condition
-        lo_x = _dot(&coord[0], &reciprocal[0][0]) <= r
-        hi_x = _dot(&other[0], &reciprocal[0][0]) <= r
-        lo_y = _dot(&coord[0], &reciprocal[1][0]) <= r
-        hi_y = _dot(&other[0], &reciprocal[1][0]) <= r
-        lo_z = _dot(&coord[0], &reciprocal[2][0]) <= r
-        hi_z = _dot(&other[0], &reciprocal[2][0]) <= r
-
-        if lo_x:
-            # if X, face piece
+        # identify the condition and collect the box translation vectors
+        # pointing away from every wall the particle is close to
+        n_shifts = 0
+        for k in range(3):
+            # distance from the lower wall, written out so that it is
+            # inlined rather than calling _dot from another module
+            dist = (coord[0] * reciprocal[k][0] +
+                    coord[1] * reciprocal[k][1] +
+                    coord[2] * reciprocal[k][2])
+            if dist <= r:
+                sign = 1.0
+            elif width[k] - dist <= r:
+                sign = -1.0
+            else:
+                continue
+            for j in range(3):
+                shift[n_shifts][j] = sign * dm[k][j]
+            n_shifts += 1
+
+        # every non-empty combination of the collected translations, encoded
+        # by the bits of m, yields one image: a face piece for a single
+        # translation, an edge piece for two and a corner piece for three.
+        # Each image is obtained from the one lacking the lowest set bit of m
+        # (m & (m - 1), which precedes m) by adding a single translation.
+        for j in range(3):
+            combos[0][j] = coord[j]
+        for m in range(1, 1 << n_shifts):
+            k = 0
+            while not (m >> k) & 1:
+                k += 1
             for j in range(3):
+                combos[m][j] = combos[m & (m - 1)][j] + shift[k][j]
                 # add to output
-                output.push_back(coord[j] + shiftX[j])
+                output.push_back(combos[m][j])
             # keep record of which index this augmented
             # position was created from
             indices.push_back(i)
 
-            if lo_y:
-                # if X&Y, edge piece
-                for j in range(3):
-                    output.push_back(coord[j] + shiftX[j] + shiftY[j])
-                indices.push_back(i)
-
-                if lo_z:
-                    # if X&Y&Z, corner piece
-                    for j in range(3):
-                        output.push_back(coord[j] + shiftX[j] + shiftY[j] + shiftZ[j])
-                    indices.push_back(i)
-
-                elif hi_z:
-                    for j in range(3):
-                        output.push_back(coord[j] + shiftX[j] + shiftY[j] - shiftZ[j])
-                    indices.push_back(i)
-
-            elif hi_y:
-                for j in range(3):
-                    output.push_back(coord[j] + shiftX[j] - shiftY[j])
-                indices.push_back(i)
-
-                if lo_z:
-                    for j in range(3):
-                        output.push_back(coord[j] + shiftX[j] - shiftY[j] + shiftZ[j])
-                    indices.push_back(i)
-
-                elif hi_z:
-                    for j in range(3):
-                        output.push_back(coord[j] + shiftX[j] - shiftY[j] - shiftZ[j])
-                    indices.push_back(i)
-
-            if lo_z:
-                for j in range(3):
-                    output.push_back(coord[j] + shiftX[j] + shiftZ[j])
-                indices.push_back(i)
-
-            elif hi_z:
-                for j in range(3):
-                    output.push_back(coord[j] + shiftX[j] - shiftZ[j])
-                indices.push_back(i)
-
-        elif hi_x:
-            for j in range(3):
-                output.push_back(coord[j] - shiftX[j])
-            indices.push_back(i)
-
-            if lo_y:
-                for j in range(3):
-                    output.push_back(coord[j] - shiftX[j] + shiftY[j])
-                indices.push_back(i)
-
-                if lo_z:
-                    for j in range(3):
-                        output.push_back(coord[j] - shiftX[j] + shiftY[j] + shiftZ[j])
-                    indices.push_back(i)
-
-                elif hi_z:
-                    for j in range(3):
-                        output.push_back(coord[j] - shiftX[j] + shiftY[j] - shiftZ[j])
-                    indices.push_back(i)
-
-            elif hi_y:
-                for j in range(3):
-                    output.push_back(coord[j] - shiftX[j] - shiftY[j])
-                indices.push_back(i)
-
-                if lo_z:
-                    for j in range(3):
-                        output.push_back(coord[j] - shiftX[j] - shiftY[j] + shiftZ[j])
-                    indices.push_back(i)
-
-                elif hi_z:
-                    for j in range(3):
-                        output.push_back(coord[j] - shiftX[j] - shiftY[j] - shiftZ[j])
-                    indices.push_back(i)
-
-            if lo_z:
-                for j in range(3):
-                    output.push_back(coord[j] - shiftX[j] + shiftZ[j])
-                indices.push_back(i)
-
-            elif hi_z:
-                for j in range(3):
-                    output.push_back(coord[j] - shiftX[j] - shiftZ[j])
-                indices.push_back(i)
-
-        if lo_y:
-            for j in range(3):
-                output.push_back(coord[j] + shiftY[j])
-            indices.push_back(i)
-
-            if lo_z:
-                for j in range(3):
-                    output.push_back(coord[j] + shiftY[j] + shiftZ[j])
-                indices.push_back(i)
-
-            elif hi_z:
-                for j in range(3):
-                    output.push_back(coord[j] + shiftY[j] - shiftZ[j])
-                indices.push_back(i)
-
-        elif hi_y:
-            for j in range(3):
-                output.push_back(coord[j] - shiftY[j])
-            indices.push_back(i)
-
-            if lo_z:
-                for j in range(3):
-                    output.push_back(coord[j] - shiftY[j] + shiftZ[j])
-                indices.push_back(i)
-
-            elif hi_z:
-                for j in range(3):
-                    output.push_back(coord[j] - shiftY[j] - shiftZ[j])
-                indices.push_back(i)
-
-        if lo_z:
-            for j in range(3):
-                output.push_back(coord[j] + shiftZ[j])
-            indices.push_back(i)
-
-        elif hi_z:
-            for j in range(3):
-                output.push_back(coord[j] - shiftZ[j])
-            indices.push_back(i)
-    n = indices.size()
-    return np.asarray(output, dtype=np.float32).reshape(n, 3), np.asarray(indices, dtype=np.intp)
+    # copy the results into numpy arrays directly instead of going through
+    # the (much slower) conversion of the vectors into Python lists
+    cdef int n = indices.size()
+    cdef float[:, ::1] images = np.empty((n, 3), dtype=np.float32)
+    cdef np.intp_t[::1] mapping = np.empty(n, dtype=np.intp)
+    for i in range(n):
+        mapping[i] = indices[i]
+        for j in range(3):
+            images[i, j] = output[3 * i + j]
+    return np.asarray(images), np.asarray(mapping)
 
 
 @cython.boundscheck(False)
@@ -34,15 +34,34 @@ from scipy.spatial import cKDTree
 
 from ._cutil import unique_int_1d
 from ._augment import augment_coordinates, undo_augment
-from .util import unique_rows
+from .util import unique_rows, check_box
 
-from MDAnalysis.lib.distances import apply_PBC
+from MDAnalysis.lib.distances import ortho_pbc, triclinic_pbc
 
 __all__ = [
     'PeriodicKDTree'
 ]
 
 
+def _lists_to_pairs(lists):
+    """Convert a list of neighbor lists into an array of index pairs
+
+    Every neighbor ``j`` in ``lists[i]`` yields the pair ``[i, j]``. The
+    pairs are assembled with vectorized operations instead of a Python loop
+    over all neighbors. An empty one-dimensional array is returned if there
+    are no neighbors at all.
+    """
+    lengths = np.fromiter(map(len, lists), dtype=np.intp, count=len(lists))
+    n_pairs = lengths.sum()
+    if n_pairs == 0:
+        return np.array([], dtype=np.intp)
+    pairs = np.empty((n_pairs, 2), dtype=np.intp)
+    pairs[:, 0] = np.repeat(np.arange(len(lists)), lengths)
+    pairs[:, 1] = np.fromiter(itertools.chain.from_iterable(lists),
+                              dtype=np.intp, count=n_pairs)
+    return pairs
+
+
 class PeriodicKDTree(object):
     """Wrapper around :class:`scipy.spatial.cKDTree`
 
@@ -51,15 +70,22 @@ class PeriodicKDTree(object):
     provided while constructing the tree.
 
     To enable periodic boundary conditions, box dimensions must be
-    provided. Periodic Boundary conditions are implemented by creating
-    duplicates of the particles which are within the specified cutoff
-    distance from the boundary. These duplicates along with the
-    original particle coordinates are used with the cKDTree without
-    any special treatment due to PBC beyond this point.  The final
-    results after any operation with duplicate particle indices can be
-    traced back to the original particle using the
+    provided. For orthogonal boxes, periodic boundary conditions are
+    handled natively by :class:`scipy.spatial.cKDTree` through its
+    `boxsize` argument. For triclinic boxes, periodic boundary conditions
+    are implemented by creating duplicates of the particles which are
+    within the specified cutoff distance from the boundary. These
+    duplicates along with the original particle coordinates are used
+    with the cKDTree without any special treatment due to PBC beyond this
+    point.  The final results after any operation with duplicate particle
+    indices can be traced back to the original particle using the
     :func:`MDAnalysis.lib.distances.undo_augment` function.
 
+
+    .. versionchanged:: 2.0.0
+       Periodic boundary conditions in orthogonal boxes are handled by
+       :class:`scipy.spatial.cKDTree` directly instead of generating
+       duplicate images.
     """
     def __init__(self, box=None, leafsize=10):
         """
@@ -83,6 +109,14 @@ class PeriodicKDTree(object):
         self.box = box
         self._built = False
         self.cutoff = None
+        self._input_coords = None
+        self._n_points = 0
+        # the box type and dimensions are only checked once
+        self._boxsize = None
+        if self.pbc:
+            self._boxtype, self._box = check_box(box)
+            if self._boxtype == 'ortho':
+                self._boxsize = self._box
 
     @property
     def pbc(self):
@@ -95,19 +129,57 @@ class PeriodicKDTree(object):
         """
         return self.box is not None
 
+    def _wrap(self, coords):
+        """Return a float32 copy of `coords` moved into the primary unit cell
+
+        The copy is wrapped in place, so `coords` is left untouched.
+        """
+        coords = np.array(coords, dtype=np.float32, order='C', ndmin=2)
+        if self._boxtype == 'ortho':
+            ortho_pbc(coords, self._box)
+        else:
+            triclinic_pbc(coords, self._box)
+        return coords
+
+    def _prepare_centers(self, centers, radius):
+        """Validate a query and return the centers as an ``(N, 3)`` array
+
+        For periodic trees holding any points, the centers are wrapped
+        into the primary unit cell.
+        """
+        if not self._built:
+            raise RuntimeError('Unbuilt tree. Run tree.set_coords(...)')
+
+        centers = np.asarray(centers)
+        if centers.shape == (self.dim, ):
+            centers = centers.reshape((1, self.dim))
+
+        # Sanity check
+        if self.pbc and self.cutoff < radius:
+            raise RuntimeError('Set cutoff greater or equal to the radius.')
+
+        if self.pbc and self._n_points > 0:
+            # Bring all query points to the central cell
+            centers = self._wrap(centers)
+        return centers
+
     def set_coords(self, coords, cutoff=None):
         """Constructs KDTree from the coordinates
 
         Wrapping of coordinates to the primary unit cell is enforced
         before any distance evaluations. If periodic boundary conditions
-        are enabled, then duplicate particles are generated in the
-        vicinity of the box. An additional array `mapping` is also
-        generated which can be later used to trace the origin of
-        duplicate particle coordinates.
+        are enabled in a triclinic box, then duplicate particles are
+        generated in the vicinity of the box. An additional array `mapping`
+        is also generated which can be later used to trace the origin of
+        duplicate particle coordinates. Orthogonal boxes do not require
+        duplicate particles, hence `mapping` is empty in that case.
 
         For non-periodic calculations, cutoff should not be provided
         the parameter is only required for periodic calculations.
 
+        If the tree has already been built from identical coordinates with
+        the same cutoff, it is kept as is instead of being rebuilt.
+
         Parameters
         ----------
         coords: array_like
@@ -131,28 +203,48 @@ class PeriodicKDTree(object):
             raise RuntimeError('Provide a cutoff distance'
                                ' with tree.set_coords(...)')
 
-        # set coords dtype to float32
-        # augment coordinates will work only with float32
+        # Compare against a private copy of the previous input, the caller
+        # may have modified that array in place in the meantime
         coords = np.asarray(coords, dtype=np.float32)
+        if (self._built and cutoff == self.cutoff and
+                np.array_equal(coords, self._input_coords)):
+            return
 
         if self.pbc:
             self.cutoff = cutoff
             # Bring the coordinates in the central cell
-            self.coords = apply_PBC(coords, self.box)
-            # generate duplicate images
-            self.aug, self.mapping = augment_coordinates(self.coords,
-                                                         self.box,
-                                                         self.cutoff)
-            # Images + coords
-            self.all_coords = np.concatenate([self.coords, self.aug])
-            self.ckdt = cKDTree(self.all_coords, leafsize=self.leafsize)
+            # augment coordinates will work only with float32
+            self.coords = self._wrap(coords)
+            if self._boxtype == 'ortho':
+                # cKDTree handles orthogonal periodicity natively,
+                # no duplicate images are required
+                self.aug = np.empty((0, self.dim), dtype=np.float32)
+                self.mapping = np.empty(0, dtype=np.intp)
+                self.all_coords = self.coords
+            else:
+                # generate duplicate images
+                self.aug, self.mapping = augment_coordinates(self.coords,
+                                                             self.box,
+                                                             self.cutoff)
+                # Images + coords, assembled directly in the C-contiguous
+                # float64 layout used by cKDTree so that it is not copied
+                # once more when building the tree
+                n_coords = len(self.coords)
+                self.all_coords = np.empty((n_coords + len(self.aug),
+                                            self.dim), dtype=np.float64)
+                self.all_coords[:n_coords] = self.coords
+                self.all_coords[n_coords:] = self.aug
+            self.ckdt = cKDTree(self.all_coords, leafsize=self.leafsize,
+                                boxsize=self._boxsize)
         else:
             # if cutoff distance is provided for non PBC calculations
             if cutoff is not None:
                 raise RuntimeError('Donot provide cutoff distance for'
                                    ' non PBC aware calculations')
-            self.coords = coords
+            self.coords = np.asarray(coords, dtype=np.float32)
             self.ckdt = cKDTree(self.coords, self.leafsize)
+        self._input_coords = coords.copy()
+        self._n_points = len(self.coords)
         self._built = True
 
     def search(self, centers, radius):
@@ -169,38 +261,76 @@ class PeriodicKDTree(object):
         radius: float
           maximum distance to search for neighbors.
         """
+        wrapped_centers = self._prepare_centers(centers, radius)
+        if self._n_points == 0:
+            self._indices = np.array([], dtype=np.intp)
+            return self._indices
+
+        if len(wrapped_centers) == 1 and not (self.pbc and self.mapping.size):
+            # A single query on a tree without duplicate images cannot
+            # yield duplicate indices, sorting them is sufficient
+            self._indices = np.array(
+                self.ckdt.query_ball_point(wrapped_centers[0], radius),
+                dtype=np.intp)
+            self._indices.sort()
+            return self._indices
+
+        indices = self.ckdt.query_ball_point(wrapped_centers, radius)
+        # flatten the per-center neighbor lists directly into an array
+        self._indices = np.fromiter(itertools.chain.from_iterable(indices),
+                                    dtype=np.intp)
+        if self.pbc and self._indices.size > 0:
+            self._indices = undo_augment(self._indices,
+                                         self.mapping,
+                                         len(self.coords))
+        self._indices = np.asarray(unique_int_1d(self._indices))
+        return self._indices
 
-        if not self._built:
-            raise RuntimeError('Unbuilt tree. Run tree.set_coords(...)')
+    def search_batch(self, centers, radius, workers=1):
+        """Search all points within radius from each of the centers.
 
-        centers = np.asarray(centers)
-        if centers.shape == (self.dim, ):
-            centers = centers.reshape((1, self.dim))
+        In contrast to :meth:`search`, the neighbors are not merged but
+        returned separately for every center. All centers are processed with
+        a single query of the tree.
 
-        # Sanity check
-        if self.pbc:
-            if self.cutoff < radius:
-                raise RuntimeError('Set cutoff greater or equal to the radius.')
-            # Bring all query points to the central cell
-            wrapped_centers = apply_PBC(centers, self.box)
-            indices = list(self.ckdt.query_ball_point(wrapped_centers,
-                                                      radius))
-            self._indices = np.array(list(
-                                     itertools.chain.from_iterable(indices)),
-                                     dtype=np.intp)
-            if self._indices.size > 0:
-                self._indices = undo_augment(self._indices,
-                                             self.mapping,
-                                             len(self.coords))
-        else:
-            wrapped_centers = np.asarray(centers)
-            indices = list(self.ckdt.query_ball_point(wrapped_centers,
-                                                      radius))
-            self._indices = np.array(list(
-                                     itertools.chain.from_iterable(indices)),
-                                     dtype=np.intp)
-        self._indices = np.asarray(unique_int_1d(self._indices))
-        return self._indices
+        Parameters
+        ----------
+        centers: array_like (N,3)
+          coordinate array to search for neighbors
+        radius: float
+          maximum distance to search for neighbors.
+        workers: int, optional
+          Number of threads used to query the tree for the centers in
+          parallel. ``-1`` uses all available CPU cores. Values other than
+          ``1`` require scipy 1.6 or newer.
+
+        Returns
+        -------
+        indices : list
+          list of N sorted arrays, the ``i``-th array containing the
+          neighbors of ``centers[i]``
+
+
+        .. versionadded:: 2.0.0
+        """
+        wrapped_centers = self._prepare_centers(centers, radius)
+        if len(wrapped_centers) == 0:
+            return []
+        if self._n_points == 0:
+            return [np.array([], dtype=np.intp)
+                    for _ in range(len(wrapped_centers))]
+
+        # only pass workers on if required to support older scipy versions
+        kwargs = {} if workers == 1 else {'workers': workers}
+        indices = self.ckdt.query_ball_point(wrapped_centers, radius, **kwargs)
+        lengths = np.fromiter(map(len, indices), dtype=np.intp,
+                              count=len(indices))
+        flat = np.fromiter(itertools.chain.from_iterable(indices),
+                           dtype=np.intp, count=lengths.sum())
+        if self.pbc and flat.size > 0:
+            flat = undo_augment(flat, self.mapping, len(self.coords))
+        return [np.asarray(unique_int_1d(idx))
+                for idx in np.split(flat, np.cumsum(lengths)[:-1])]
 
     def get_indices(self):
         """Return the neighbors from the last query.
@@ -232,17 +362,20 @@ class PeriodicKDTree(object):
             if self.cutoff < radius:
                 raise RuntimeError('Set cutoff greater or equal to the radius.')
 
-        pairs = np.array(list(self.ckdt.query_pairs(radius)), dtype=np.intp)
-        if self.pbc:
-            if len(pairs) > 1:
-                pairs[:, 0] = undo_augment(pairs[:, 0], self.mapping,
-                                           len(self.coords))
-                pairs[:, 1] = undo_augment(pairs[:, 1], self.mapping,
-                                           len(self.coords))
-        if pairs.size > 0:
+        pairs = self.ckdt.query_pairs(radius, output_type='ndarray')
+        if pairs.size == 0:
+            return np.array([], dtype=np.intp)
+        if self.pbc and self.mapping.size > 0:
+            # translate both columns at once
+            pairs = undo_augment(pairs.ravel(), self.mapping,
+                                 len(self.coords)).reshape(-1, 2)
             # First sort the pairs then pick the unique pairs
             pairs = np.sort(pairs, axis=1)
             pairs = unique_rows(pairs)
+        else:
+            # Without images the pairs are unique and each pair is already
+            # sorted, only the order of the pairs has to be established
+            pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
         return pairs
 
     def search_tree(self, centers, radius):
@@ -275,33 +408,17 @@ class PeriodicKDTree(object):
         and queries the previously built tree (built in
         :meth:`set_coords`)
         """
-
-        if not self._built:
-            raise RuntimeError('Unbuilt tree. Run tree.set_coords(...)')
-
-        centers = np.asarray(centers)
-        if centers.shape == (self.dim, ):
-            centers = centers.reshape((1, self.dim))
-
-        # Sanity check
-        if self.pbc:
-            if self.cutoff < radius:
-                raise RuntimeError('Set cutoff greater or equal to the radius.')
-            # Bring all query points to the central cell
-            wrapped_centers = apply_PBC(centers, self.box)
-            other_tree = cKDTree(wrapped_centers, leafsize=self.leafsize)
-            pairs = other_tree.query_ball_tree(self.ckdt, radius)
-            pairs = np.array([[i, j] for i, lst in enumerate(pairs) for j in lst],
-                                   dtype=np.intp)
-            if pairs.size > 0:
-                pairs[:, 1] = undo_augment(pairs[:, 1],
-                                             self.mapping,
-                                             len(self.coords))
-        else:
-            other_tree = cKDTree(centers, leafsize=self.leafsize)
-            pairs = other_tree.query_ball_tree(self.ckdt, radius)
-            pairs = np.array([[i, j] for i, lst in enumerate(pairs) for j in lst],
-                                   dtype=np.intp)
+        wrapped_centers = self._prepare_centers(centers, radius)
+        if self._n_points == 0:
+            return np.array([], dtype=np.intp)
+
+        other_tree = cKDTree(wrapped_centers, leafsize=self.leafsize,
+                             boxsize=self._boxsize)
+        pairs = _lists_to_pairs(other_tree.query_ball_tree(self.ckdt, radius))
+        if self.pbc and pairs.size > 0:
+            pairs[:, 1] = undo_augment(pairs[:, 1],
+                                       self.mapping,
+                                       len(self.coords))
         if pairs.size > 0:
             pairs = unique_rows(pairs)
         return pairs
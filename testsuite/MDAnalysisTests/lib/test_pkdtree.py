@@ -27,7 +27,7 @@ from numpy.testing import assert_equal
 
 
 from MDAnalysis.lib.pkdtree import PeriodicKDTree
-from MDAnalysis.lib.distances import transform_StoR
+from MDAnalysis.lib.distances import transform_StoR, distance_array
 
 
 # fractional coordinates for data points
@@ -56,6 +56,38 @@ def test_setcoords(b, cut, result):
         tree.set_coords(coords, cutoff=cut)
 
 
+@pytest.mark.parametrize('b', ([10, 10, 10, 90, 90, 90],
+                               [10, 10, 10, 45, 60, 90]))
+@pytest.mark.parametrize('dtype', (np.float32, np.float64))
+def test_setcoords_input_unchanged(b, dtype):
+    b = np.array(b, dtype=np.float32)
+    coords = transform_StoR(f_dataset, b).astype(dtype)
+    ref = coords.copy()
+    tree = PeriodicKDTree(box=b)
+    tree.set_coords(coords, cutoff=1.0)
+    assert_equal(coords, ref)
+
+
+@pytest.mark.parametrize('b, cut', ((None, None),
+                                    ([10, 10, 10, 90, 90, 90], 3.0),
+                                    ([10, 10, 10, 45, 60, 90], 3.0)))
+def test_setcoords_inplace_modification(b, cut):
+    if b is not None:
+        b = np.array(b, dtype=np.float32)
+    coords = f_dataset.copy()
+    q = np.array([0.2, 0.2, 0.2], dtype=np.float32)
+    tree = PeriodicKDTree(box=b)
+    tree.set_coords(coords, cutoff=cut)
+    assert_equal(tree.search(q, 0.1), [0])
+    # same coordinates again
+    tree.set_coords(coords, cutoff=cut)
+    assert_equal(tree.search(q, 0.1), [0])
+    # same array, modified in place
+    coords[[0, 1]] = coords[[1, 0]]
+    tree.set_coords(coords, cutoff=cut)
+    assert_equal(tree.search(q, 0.1), [1])
+
+
 def test_searchfail():
     coords = np.array([[1, 1, 1], [2, 2, 2]], dtype=np.float32)
     b = np.array([10, 10, 10, 90, 90, 90], dtype=np.float32)
@@ -85,6 +117,129 @@ def test_search(b, q, result):
     assert_equal(indices, result)
 
 
+@pytest.mark.parametrize('b', ([10, 10, 10, 90, 90, 90],
+                               [10, 15, 20, 90, 90, 90],
+                               [10, 10, 10, 45, 60, 90]))
+def test_search_bruteforce(b):
+    b = np.array(b, dtype=np.float32)
+    cutoff = 2.5
+    rng = np.random.RandomState(42)
+    coords = transform_StoR(rng.uniform(-0.5, 1.5, size=(200, 3))
+                            .astype(np.float32), b)
+    q = transform_StoR(rng.uniform(-0.5, 1.5, size=(5, 3))
+                       .astype(np.float32), b)
+    tree = PeriodicKDTree(box=b)
+    tree.set_coords(coords, cutoff=cutoff)
+    for center in q:
+        dist = distance_array(center, coords, box=b)[0]
+        assert_equal(tree.search(center, cutoff),
+                     np.where(dist <= cutoff)[0])
+
+
+@pytest.mark.parametrize('b', (None,
+                               [10, 10, 10, 90, 90, 90],
+                               [10, 10, 10, 45, 60, 90]))
+def test_search_batch(b):
+    cutoff = 3.0
+    q = np.array([[0.5, -0.1, 1.1],
+                  [2.1, -3.1, 0.1],
+                  [0.2, 0.2, 0.2]], dtype=np.float32)
+    if b is None:
+        tree = PeriodicKDTree()
+        tree.set_coords(f_dataset * 10)
+        q *= 10
+    else:
+        b = np.array(b, dtype=np.float32)
+        q = transform_StoR(q, b)
+        tree = PeriodicKDTree(box=b)
+        tree.set_coords(transform_StoR(f_dataset, b), cutoff=cutoff)
+    results = tree.search_batch(q, cutoff)
+    assert len(results) == len(q)
+    for center, indices in zip(q, results):
+        assert_equal(indices, tree.search(center, cutoff))
+
+
+def test_search_batch_workers():
+    b = np.array([10, 10, 10, 45, 60, 90], dtype=np.float32)
+    rng = np.random.RandomState(42)
+    coords = transform_StoR(rng.uniform(size=(200, 3)).astype(np.float32), b)
+    q = transform_StoR(rng.uniform(size=(50, 3)).astype(np.float32), b)
+    tree = PeriodicKDTree(box=b)
+    tree.set_coords(coords, cutoff=2.0)
+    serial = tree.search_batch(q, 2.0)
+    parallel = tree.search_batch(q, 2.0, workers=2)
+    assert len(parallel) == len(serial)
+    for ref, indices in zip(serial, parallel):
+        assert_equal(indices, ref)
+
+
+def test_search_batch_empty():
+    tree = PeriodicKDTree()
+    tree.set_coords(f_dataset)
+    assert tree.search_batch(np.empty((0, 3)), 0.3) == []
+
+
+@pytest.mark.parametrize('b', (None,
+                               [10, 10, 10, 90, 90, 90],
+                               [10, 10, 10, 45, 60, 90]))
+def test_search_ndarray_radius(b):
+    q = np.array([0.2, 0.2, 0.2], dtype=np.float32)
+    if b is None:
+        tree = PeriodicKDTree()
+        tree.set_coords(f_dataset)
+    else:
+        tree = PeriodicKDTree(box=np.array(b, dtype=np.float32))
+        tree.set_coords(f_dataset, cutoff=3.0)
+    assert_equal(tree.search(q, np.array(0.15)), tree.search(q, 0.15))
+
+
+def test_search_repeated():
+    b = np.array([10, 10, 10, 90, 90, 90], dtype=np.float32)
+    q = transform_StoR(np.array([2.1, -3.1, 0.1], dtype=np.float32), b)
+    coords = transform_StoR(f_dataset, b)
+    tree = PeriodicKDTree(box=b)
+    tree.set_coords(coords, cutoff=3.0)
+    indices = tree.search(q, 3.0)
+    assert_equal(indices, [2, 3, 4])
+    # modifying a result must not affect later searches
+    indices[:] = -1
+    assert_equal(tree.search(q, 3.0), [2, 3, 4])
+    assert_equal(tree.search(q, 0.1), [3])
+    # searches after set_coords use the new coordinates
+    tree.set_coords(coords[:3], cutoff=3.0)
+    assert_equal(tree.search(q, 3.0), [2])
+
+
+@pytest.mark.parametrize('b, cut', ((None, None),
+                                    ([10, 10, 10, 90, 90, 90], 3.0),
+                                    ([10, 10, 10, 45, 60, 90], 3.0)))
+def test_empty_tree(b, cut):
+    if b is not None:
+        b = np.array(b, dtype=np.float32)
+    q = np.array([[0.2, 0.2, 0.2], [0.5, 0.5, 0.5]], dtype=np.float32)
+    tree = PeriodicKDTree(box=b)
+    tree.set_coords(np.empty((0, 3), dtype=np.float32), cutoff=cut)
+    assert_equal(tree.search(q, 0.3), [])
+    assert_equal(tree.get_indices(), [])
+    assert_equal(tree.search_batch(q, 0.3), [[], []])
+    assert_equal(tree.search_pairs(0.3), [])
+    assert_equal(tree.search_tree(q, 0.3), [])
+
+
+@pytest.mark.parametrize('b', ([10, 10, 10, 90, 90, 90],
+                               [10, 10, 10, 45, 60, 90]))
+@pytest.mark.parametrize('method', ('search', 'search_batch', 'search_tree'))
+@pytest.mark.parametrize('q', ([0.2, 0.2, 0.2],
+                               [[0.2, 0.2, 0.2], [0.5, 0.5, 0.5]],
+                               np.empty((0, 3), dtype=np.float32)))
+def test_empty_tree_radius_gt_cutoff(b, method, q):
+    tree = PeriodicKDTree(box=np.array(b, dtype=np.float32))
+    tree.set_coords(np.empty((0, 3), dtype=np.float32), cutoff=1.0)
+    with pytest.raises(RuntimeError,
+                       match='Set cutoff greater or equal to the radius.'):
+        getattr(tree, method)(np.asarray(q, dtype=np.float32), 2.0)
+
+
 def test_nopbc():
     cutoff = 0.3
     q = np.array([0.2, 0.3, 0.1])
@@ -95,6 +250,16 @@ def test_nopbc():
     assert_equal(indices, [0, 2])
 
 
+def test_nopbc_center_precision():
+    # non periodic query centers are used at the precision given
+    coords = np.zeros((1, 3), dtype=np.float32)
+    q = np.array([1.00000001, 0, 0])
+    tree = PeriodicKDTree()
+    tree.set_coords(coords)
+    assert_equal(tree.search(q, 1.0), [])
+    assert_equal(tree.search_tree(q, 1.0), [])
+
+
 @pytest.mark.parametrize('b, radius, result', (
                          ([10, 10, 10, 90, 90, 90], 2.0,  [[0, 2],
                                                            [0, 4],
@@ -119,6 +284,37 @@ def test_searchpairs(b, radius, result):
         assert_equal(len(indices), len(result))
 
 
+@pytest.mark.parametrize('b', ([10, 10, 10, 90, 90, 90],
+                               [10, 10, 10, 45, 60, 90]))
+def test_searchpairs_across_boundary(b):
+    # a pair which is only found through periodic images
+    b = np.array(b, dtype=np.float32)
+    coords = transform_StoR(np.array([[0.05, 0.5, 0.5],
+                                      [0.95, 0.5, 0.5]], dtype=np.float32), b)
+    tree = PeriodicKDTree(box=b)
+    tree.set_coords(coords, cutoff=2.0)
+    assert_equal(tree.search_pairs(2.0), [[0, 1]])
+
+
+@pytest.mark.parametrize('b', (None,
+                               [10, 15, 20, 90, 90, 90],
+                               [10, 10, 10, 45, 60, 90]))
+def test_searchpairs_bruteforce(b):
+    cutoff = 2.5
+    rng = np.random.RandomState(42)
+    coords = rng.uniform(0, 10, size=(200, 3)).astype(np.float32)
+    if b is None:
+        tree = PeriodicKDTree()
+        tree.set_coords(coords)
+    else:
+        b = np.array(b, dtype=np.float32)
+        tree = PeriodicKDTree(box=b)
+        tree.set_coords(coords, cutoff=cutoff)
+    dist = distance_array(coords, coords, box=b)
+    expected = np.argwhere(np.triu(dist <= cutoff, k=1))
+    assert_equal(tree.search_pairs(cutoff), expected)
+
+
 @pytest.mark.parametrize('radius, result', ((0.1, []),
                                             (0.3, [[0, 2]])))
 def test_ckd_searchpairs_nopbc(radius, result):